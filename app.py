@@ -6,7 +6,6 @@ Main application launcher
 """
 
 import sys
-import subprocess
 import logging
 from pathlib import Path
 
@@ -19,14 +18,28 @@ logger = logging.getLogger(__name__)
 def main():
     """Launch the Aegis application."""
     logger.info("Starting Aegis application...")
-    
-    # Launch Streamlit
-    subprocess.run([
-        sys.executable, "-m", "streamlit", "run",
-        "src/ui/streamlit_app.py",
-        "--server.port", "8501",
-        "--server.address", "localhost"
-    ])
+
+    # Create data directories once at startup
+    from config.config import Config
+    Config.bootstrap()
+
+    # Launch Streamlit in-process. Running the server in this interpreter
+    # avoids forking a second Python that re-imports all the heavy
+    # dependencies (torch, faiss, sentence-transformers).
+    from streamlit.web import bootstrap
+    # bootstrap.run does not apply flag_options to the config itself -
+    # the CLI does that via load_config_options before calling run - so
+    # set the options explicitly to keep the explicit port and
+    # localhost-only binding
+    bootstrap.load_config_options(
+        flag_options={"server.port": 8501, "server.address": "localhost"}
+    )
+    bootstrap.run(
+        str(Path(__file__).parent / "src" / "ui" / "streamlit_app.py"),
+        False,
+        [],
+        {}
+    )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
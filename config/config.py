@@ -6,7 +6,19 @@ from pathlib import Path
 # Load environment variables
 load_dotenv()
 
+# Single canonical configuration module - import Config from here only
+__all__ = ['Config']
+
 class Config:
+    # Shared singleton instance - every Config() call returns the same
+    # object, so modules can keep instantiating it cheaply
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
     # IBM watsonx.ai settings
     WATSONX_API_KEY = os.getenv('WATSONX_API_KEY')
     WATSONX_PROJECT_ID = os.getenv('WATSONX_PROJECT_ID')
@@ -38,7 +50,13 @@ class Config:
     CHUNK_OVERLAP = 50
     TOP_K_RETRIEVAL = 3
     
-    # Create directories if they don't exist
-    COMPLIANCE_DOCS_DIR.mkdir(parents=True, exist_ok=True)
-    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+    @classmethod
+    def bootstrap(cls):
+        """Create the data directories if they don't exist.
+
+        Called once at application start instead of on every import, so
+        modules importing Config don't pay repeated mkdir syscalls.
+        """
+        cls.COMPLIANCE_DOCS_DIR.mkdir(parents=True, exist_ok=True)
+        cls.PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -78,7 +78,10 @@ def create_sample_documents():
 def main():
     """Main data preparation pipeline."""
     logger.info("=== Aegis Data Preparation ===\n")
-    
+
+    # Create data directories once at startup
+    Config.bootstrap()
+
     # Create sample documents (replace with real document loading in production)
     create_sample_documents()
     
@@ -74,16 +74,28 @@ def test_file_system():
         logger.error(f"❌ File system error: {e}")
         return False
 
+async def _named_test(name, coro):
+    """Run a test coroutine and tag its result with the service name."""
+    return name, await coro
+
 async def main():
     """Run all tests."""
     logger.info("=== Aegis Connection Tests ===\n")
-    
-    results = {
-        "Watson": await test_watson_connection(),
-        "Ollama": test_ollama_connection(),
-        "File System": test_file_system()
-    }
-    
+
+    # Run the tests concurrently so the network-bound Watson check
+    # overlaps with the Ollama and filesystem checks; sync tests are
+    # pushed onto worker threads. Results are reported as they finish.
+    tests = [
+        _named_test("Watson", test_watson_connection()),
+        _named_test("Ollama", asyncio.to_thread(test_ollama_connection)),
+        _named_test("File System", asyncio.to_thread(test_file_system))
+    ]
+
+    results = {}
+    for finished in asyncio.as_completed(tests):
+        name, passed = await finished
+        results[name] = passed
+
     logger.info("\n=== Test Results ===")
     for service, result in results.items():
         status = "✅ PASS" if result else "❌ FAIL"
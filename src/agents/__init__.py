@@ -0,0 +1,9 @@
+# src/agents/__init__.py
+import asyncio
+import os
+
+# Cap concurrent Ollama generations to match the server's
+# OLLAMA_NUM_PARALLEL setting. One semaphore shared by every agent:
+# per-module semaphores would let Worker plus Guardian queue twice the
+# server's capacity in flight.
+ollama_semaphore = asyncio.Semaphore(int(os.getenv('OLLAMA_NUM_PARALLEL', '4')))
@@ -0,0 +1,164 @@
+# src/agents/guardian_agent.py
+import logging
+import ollama
+import orjson
+from typing import Dict, List, Optional
+from config.config import Config
+from src.agents import ollama_semaphore as _ollama_semaphore
+
+logger = logging.getLogger(__name__)
+
+class GuardianAgent:
+    """Safety and quality assurance agent using granite-guardian."""
+
+    def __init__(self):
+        self.config = Config()
+        self.ollama_client = ollama.AsyncClient(host=self.config.OLLAMA_HOST)
+
+    async def prewarm(self):
+        """Load the guardian model into Ollama ahead of a review.
+
+        An empty-prompt generate makes Ollama pull the model into memory
+        without producing tokens, so a review that follows skips the
+        model-load latency entirely.
+        """
+        try:
+            async with _ollama_semaphore:
+                await self.ollama_client.generate(
+                    model=self.config.GUARDIAN_MODEL,
+                    prompt='',
+                    keep_alive='30m'
+                )
+        except Exception as e:
+            logger.debug(f"Guardian prewarm failed: {e}")
+
+    async def review_alert(self, alert: Dict[str, any], original_utterance: str) -> Dict[str, any]:
+        """
+        Review and refine an alert from the WorkerAgent.
+
+        Args:
+            alert: Alert dictionary from WorkerAgent
+            original_utterance: The original statement being analyzed
+
+        Returns:
+            Refined alert dictionary
+        """
+        try:
+            # Only review if risk was detected
+            if not alert.get('risk_detected', False):
+                return alert
+
+            # Construct review prompt
+            prompt = f"""
+You are a safety and quality reviewer for compliance alerts. Review the following alert:
+
+Original Statement: "{original_utterance}"
+Alert Explanation: "{alert['explanation']}"
+Suggested Alternative: "{alert['suggestion']}"
+
+Your tasks:
+1. Ensure the alert is clear, professional, and helpful
+2. Check that the suggested alternative doesn't introduce new risks
+3. Refine the language to be constructive, not punitive
+4. Verify the suggestion is actionable
+
+Provide your refined alert in JSON format:
+{{
+    "risk_detected": true,
+    "explanation": "Refined explanation",
+    "suggestion": "Refined suggestion",
+    "quality_score": 0-10
+}}
+"""
+
+            # Use guardian model for review (async, so the event loop
+            # stays free while the model generates)
+            async with _ollama_semaphore:
+                response = await self.ollama_client.generate(
+                    model=self.config.GUARDIAN_MODEL,
+                    prompt=prompt,
+                    system=self._get_system_prompt(),
+                    format='json',
+                    keep_alive='30m'
+                )
+
+            # Parse response
+            try:
+                refined = orjson.loads(response['response'])
+
+                # Merge with original alert
+                result = alert.copy()
+
+                # Update with refined content if quality is good
+                quality_score = refined.get('quality_score', 5)
+                if quality_score >= 7:
+                    result['explanation'] = refined.get('explanation', alert['explanation'])
+                    result['suggestion'] = refined.get('suggestion', alert['suggestion'])
+                    result['guardian_reviewed'] = True
+                    result['quality_score'] = quality_score
+                else:
+                    # If quality is low, keep original but flag it
+                    result['guardian_reviewed'] = True
+                    result['quality_score'] = quality_score
+                    result['needs_improvement'] = True
+
+                return result
+
+            except orjson.JSONDecodeError:
+                logger.error(f"Failed to parse guardian response: {response['response']}")
+                # Return original alert if parsing fails
+                alert['guardian_reviewed'] = False
+                return alert
+
+        except Exception as e:
+            logger.error(f"Error in guardian review: {e}")
+            alert['guardian_reviewed'] = False
+            return alert
+
+    def _get_system_prompt(self) -> str:
+        """Get the system prompt for the guardian model."""
+        return """You are a quality assurance specialist for compliance alerts.
+Your role is to ensure alerts are:
+- Clear and easy to understand
+- Professional and respectful in tone
+- Constructive and helpful
+- Free from unintended risks or ambiguity
+Always respond in JSON format.
+Rate quality from 0-10, where 10 is perfect."""
+
+    async def validate_compliance_rules(self, rules: List[str]) -> List[str]:
+        """
+        Validate that compliance rules are appropriate and safe.
+
+        Args:
+            rules: List of compliance rules
+
+        Returns:
+            Validated rules
+        """
+        # This method can be used to verify that the RAG-retrieved rules
+        # are appropriate and don't contain any harmful content
+        validated_rules = []
+
+        for rule in rules:
+            if self._is_rule_safe(rule):
+                validated_rules.append(rule)
+
+        return validated_rules
+
+    def _is_rule_safe(self, rule: str) -> bool:
+        """Check if a rule is safe to use."""
+        # Basic safety checks
+        unsafe_patterns = [
+            'discriminat',
+            'personal information',
+            'confidential'
+        ]
+
+        rule_lower = rule.lower()
+        for pattern in unsafe_patterns:
+            if pattern in rule_lower:
+                logger.warning(f"Potentially unsafe rule detected: {pattern}")
+                return False
+
+        return True
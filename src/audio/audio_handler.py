@@ -11,43 +11,129 @@ from config.config import Config
 
 logger = logging.getLogger(__name__)
 
+# Emit 8-bit G.711 mu-law instead of 16-bit linear PCM: half the uplink
+# bytes per second of speech at telephony-grade quality, and Watson STT
+# accepts audio/mulaw directly with no container. Set to False to
+# stream raw PCM16 again.
+USE_MULAW = True
+
+# Offset added before taking the magnitude's leading-bit position,
+# per the G.711 mu-law definition
+_MULAW_BIAS = 0x84
+
+def _pcm16_to_mulaw(samples: np.ndarray) -> bytes:
+    """Compand int16 PCM samples to G.711 mu-law bytes, vectorized."""
+    s = samples.astype(np.int32)
+    sign = np.where(s < 0, 0x80, 0)
+    magnitude = np.clip(np.abs(s), 0, 32635) + _MULAW_BIAS
+    exponent = np.floor(np.log2(magnitude)).astype(np.int32) - 7
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8).tobytes()
+
 class AudioHandler:
     """Handles real-time audio capture and streaming."""
     
-    def __init__(self, on_audio_chunk: Callable[[bytes], None]):
+    def __init__(self, on_audio_chunk: Callable[[bytes], None],
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
         self.config = Config()
         self.on_audio_chunk = on_audio_chunk
         self.is_recording = False
-        self.audio_queue = asyncio.Queue()
-        
+        # Event loop that owns the queue hand-off and chunk processing.
+        # The app injects its persistent background loop; when omitted,
+        # start_recording falls back to the caller's loop.
+        self._loop = loop
+        # Bounded; overflow chunks are dropped
+        self.audio_queue = asyncio.Queue(maxsize=2)
+        # Ring of capture buffers, sized queue capacity + 2: at most
+        # maxsize chunks sit in the queue, one more can be in the
+        # consumer's hands, and one is being written by the callback, so
+        # a buffer is never rewritten while a queued or in-flight view
+        # still references it. The PortAudio thread hands chunks off
+        # without an indata.copy() allocation.
+        self._capture_bufs = [
+            np.empty(self.config.CHUNK_SIZE, dtype=np.int16)
+            for _ in range(self.audio_queue.maxsize + 2)
+        ]
+        self._capture_active = 0
+        # Preallocated int16 scratch buffer reused for every chunk so the
+        # float->int16 conversion does not allocate on the real-time path
+        self._scratch_i16 = np.empty(self.config.CHUNK_SIZE, dtype=np.int16)
+        # Preallocated window buffer: incoming blocks are written into
+        # slices of this fixed array instead of growing a Python list and
+        # concatenating it on every emit
+        self._window = np.empty(self.config.CHUNK_SIZE, dtype=np.int16)
+        self._window_fill = 0
+
+    @property
+    def content_type(self) -> str:
+        """MIME type of the audio payloads this handler emits."""
+        if USE_MULAW:
+            return f'audio/mulaw;rate={self.config.SAMPLE_RATE}'
+        return f'audio/l16;rate={self.config.SAMPLE_RATE};channels=1'
+
+    @property
+    def bytes_per_second(self) -> int:
+        """Payload bytes per second of audio in the active format.
+
+        Mu-law is 1 byte per sample, linear PCM16 is 2; consumers sizing
+        buffers by duration should use this rather than assuming a
+        sample width.
+        """
+        return self.config.SAMPLE_RATE * (1 if USE_MULAW else 2)
+
     def start_recording(self):
         """Start recording audio from microphone."""
         self.is_recording = True
         logger.info("Starting audio recording...")
-        
+
+        # The PortAudio callback runs on a C-level thread with no event
+        # loop, so everything is handed to self._loop with thread-safe
+        # scheduling (asyncio.create_task from that thread is undefined
+        # behavior and drops chunks)
+        if self._loop is None:
+            try:
+                self._loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._loop = asyncio.get_event_loop()
+
         def audio_callback(indata, frames, time, status):
             """Callback for audio stream."""
             if status:
                 logger.warning(f"Audio callback status: {status}")
-            
+
             if self.is_recording:
-                # Convert to bytes and add to queue
-                audio_data = indata.copy()
-                asyncio.create_task(self.audio_queue.put(audio_data))
+                buf = self._capture_bufs[self._capture_active]
+                n = min(frames, buf.shape[0])
+                buf[:n] = indata[:n, 0]
+                self._capture_active = (self._capture_active + 1) % len(self._capture_bufs)
+                self._loop.call_soon_threadsafe(self._enqueue_chunk, buf[:n])
         
-        # Start audio stream
+        # Start audio stream. Capturing int16 directly halves the bytes
+        # moved through the queue and buffers compared to float32, and
+        # matches the 16-bit PCM the WAV encoder needs anyway.
         self.stream = sd.InputStream(
             samplerate=self.config.SAMPLE_RATE,
             channels=1,
             callback=audio_callback,
             blocksize=self.config.CHUNK_SIZE,
-            dtype='float32'
+            dtype='int16'
         )
         self.stream.start()
         
-        # Start processing loop
-        asyncio.create_task(self._process_audio_chunks())
+        # Start processing loop. The loop typically runs on its own
+        # thread, so the consumer is scheduled thread-safely rather than
+        # assuming this thread owns the loop.
+        self._processing_task = asyncio.run_coroutine_threadsafe(
+            self._process_audio_chunks(), self._loop
+        )
     
+    def _enqueue_chunk(self, chunk: np.ndarray):
+        """Enqueue a captured chunk, dropping it if the consumer lags."""
+        try:
+            self.audio_queue.put_nowait(chunk)
+        except asyncio.QueueFull:
+            logger.debug("Audio queue full, dropping chunk")
+
     def stop_recording(self):
         """Stop recording audio."""
         self.is_recording = False
@@ -58,45 +144,85 @@ class AudioHandler:
     
     async def _process_audio_chunks(self):
         """Process audio chunks from the queue."""
-        buffer = []
-        buffer_duration = 0
-        
+        self._window_fill = 0
+
         while self.is_recording:
             try:
                 # Get audio data from queue
                 audio_data = await asyncio.wait_for(
-                    self.audio_queue.get(), 
+                    self.audio_queue.get(),
                     timeout=0.1
                 )
-                
-                buffer.append(audio_data)
-                buffer_duration += len(audio_data) / self.config.SAMPLE_RATE
-                
-                # Send chunk when we have enough audio
-                if buffer_duration >= self.config.CHUNK_DURATION:
-                    # Combine buffer into single array
-                    combined_audio = np.concatenate(buffer)
-                    
-                    # Convert to WAV format
-                    wav_data = self._numpy_to_wav(combined_audio)
-                    
+
+                # Copy the block into the preallocated window - no list
+                # growth and no np.concatenate on every emit
+                samples = audio_data.reshape(-1)
+                free = self._window.shape[0] - self._window_fill
+                n = min(samples.shape[0], free)
+                self._window[self._window_fill:self._window_fill + n] = samples[:n]
+                self._window_fill += n
+
+                # Send chunk when the window is full
+                if self._window_fill >= self._window.shape[0]:
+                    # Ship headerless audio - Watson STT accepts both
+                    # audio/mulaw and audio/l16 directly, so the
+                    # per-chunk WAV container is skipped entirely and
+                    # mu-law halves the bytes on the wire
+                    if USE_MULAW:
+                        payload = _pcm16_to_mulaw(self._window)
+                    else:
+                        payload = self._window.tobytes()
+
+                    # Reset window, carrying over any samples that did
+                    # not fit - before the await, because the capture
+                    # ring may recycle the buffer behind `samples` while
+                    # the callback runs (payload is already a copy)
+                    self._window_fill = 0
+                    rest = samples[n:]
+                    if rest.size:
+                        self._window[:rest.size] = rest
+                        self._window_fill = rest.size
+
                     # Send to callback
-                    await self.on_audio_chunk(wav_data)
-                    
-                    # Reset buffer
-                    buffer = []
-                    buffer_duration = 0
-                    
+                    await self.on_audio_chunk(payload)
+
             except asyncio.TimeoutError:
                 continue
             except Exception as e:
                 logger.error(f"Error processing audio chunk: {e}")
     
+    def _to_int16(self, audio_data: np.ndarray) -> np.ndarray:
+        """Convert a 1-D sample array to int16, clipping loud samples."""
+        if audio_data.dtype == np.int16:
+            # Stream already captures int16, so no conversion is needed
+            return audio_data
+
+        n = audio_data.shape[0]
+        if n > self._scratch_i16.shape[0]:
+            self._scratch_i16 = np.empty(n, dtype=np.int16)
+
+        # Scale, clip, and round in place, then cast into the reused int16
+        # scratch buffer - no full-size temporaries, and loud samples clip
+        # instead of wrapping around
+        np.multiply(audio_data, 32767.0, out=audio_data)
+        np.clip(audio_data, -32768.0, 32767.0, out=audio_data)
+        np.rint(audio_data, out=audio_data)
+        audio_int16 = self._scratch_i16[:n]
+        audio_int16[:] = audio_data
+        return audio_int16
+
+    def _numpy_to_pcm16(self, audio_data: np.ndarray) -> bytes:
+        """Convert a numpy array to raw little-endian PCM16 bytes."""
+        return self._to_int16(audio_data.reshape(-1)).tobytes()
+
     def _numpy_to_wav(self, audio_data: np.ndarray) -> bytes:
-        """Convert numpy array to WAV format bytes."""
-        # Normalize float32 to int16
-        audio_int16 = (audio_data * 32767).astype(np.int16)
-        
+        """Convert numpy array to WAV format bytes.
+
+        The live path streams raw PCM16; this helper is kept for offline
+        debugging (dumping a chunk to a playable file).
+        """
+        audio_int16 = self._to_int16(audio_data.reshape(-1))
+
         # Create WAV file in memory
         wav_buffer = io.BytesIO()
         
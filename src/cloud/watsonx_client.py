@@ -1,14 +1,38 @@
 # src/cloud/watsonx_client.py
 import asyncio
 import logging
-from typing import Optional, AsyncGenerator
+from collections import OrderedDict
+from typing import Callable, Optional, AsyncGenerator
 import aiohttp
+import numpy as np
+import orjson
+import requests
+import websockets
 from ibm_watsonx_ai import APIClient, Credentials
 from ibm_watsonx_ai.foundation_models import Model
 from config.config import Config
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of embeddings kept in the in-memory cache
+EMBEDDING_CACHE_SIZE = 4096
+
+# Maximum number of texts sent to the embeddings endpoint in one request
+EMBEDDING_BATCH_SIZE = 64
+
+# How often to poll an async recognition job for completion
+STT_POLL_INTERVAL = 0.25
+
+# Give up on an async recognition job after this long; a stuck job
+# would otherwise leak the polling task and its connection
+STT_POLL_TIMEOUT = 60.0
+
+# One pooled HTTP session per event loop, keyed by id(loop). aiohttp
+# sessions are bound to the loop they were created on, so this keeps
+# connection reuse correct even when the client is driven from more
+# than one loop (e.g. the app's background I/O loop plus scripts).
+_sessions: dict = {}
+
 class WatsonxClient:
     """Client for IBM watsonx.ai services."""
     
@@ -16,6 +40,13 @@ class WatsonxClient:
         self.config = Config()
         self.credentials = None
         self.speech_model = None
+        # Persistent STT WebSocket; one TLS connection carries every
+        # audio frame of a recording session
+        self._stt_ws = None
+        self._stt_reader_task: Optional[asyncio.Task] = None
+        # LRU cache of embeddings keyed by (model_id, normalized text).
+        # Vectors are stored as float16 to halve the memory footprint.
+        self._embedding_cache: OrderedDict = OrderedDict()
         self._initialize()
     
     def _initialize(self):
@@ -38,54 +69,271 @@ class WatsonxClient:
         except Exception as e:
             logger.error(f"Failed to initialize Watson client: {e}")
             raise
-    
-    async def transcribe_audio(self, audio_data: bytes) -> str:
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the pooled HTTP session for the current event loop.
+
+        Reusing one session per loop keeps connections alive between
+        chunks, so we pay the TCP+TLS handshake once instead of on
+        every request.
+        """
+        loop = asyncio.get_event_loop()
+        session = _sessions.get(id(loop))
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=20,
+                keepalive_timeout=60,
+                ttl_dns_cache=300
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=15),
+                headers={'Authorization': f'Bearer {self.config.WATSONX_API_KEY}'}
+            )
+            _sessions[id(loop)] = session
+        return session
+
+    async def close(self):
+        """Close the pooled HTTP session owned by the current loop."""
+        session = _sessions.pop(id(asyncio.get_event_loop()), None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    async def connect_stt_stream(self, on_transcript: Callable,
+                                 content_type: Optional[str] = None) -> bool:
+        """Open a persistent WebSocket to the speech-to-text service.
+
+        Streaming recognition keeps one TCP/TLS connection for the whole
+        recording session, so audio frames go out without a per-chunk
+        handshake and transcripts arrive as soon as the service finalizes
+        them.
+
+        Args:
+            on_transcript: Async callback invoked with each final transcript
+            content_type: MIME type of the audio frames; defaults to
+                raw PCM16 at the configured sample rate
+
+        Returns:
+            True if the stream is connected
+        """
+        try:
+            ws_url = (
+                self.config.WATSONX_URL.replace('https://', 'wss://', 1)
+                + '/v1/recognize'
+            )
+            self._stt_ws = await websockets.connect(
+                ws_url,
+                additional_headers={
+                    'Authorization': f'Bearer {self.config.WATSONX_API_KEY}'
+                }
+            )
+            if content_type is None:
+                content_type = f'audio/l16;rate={self.config.SAMPLE_RATE};channels=1'
+            # decode(): action frames must go out as text, and orjson
+            # serializes to bytes
+            await self._stt_ws.send(orjson.dumps({
+                'action': 'start',
+                'content-type': content_type,
+                'interim_results': False
+            }).decode())
+            self._stt_reader_task = asyncio.create_task(
+                self._read_stt_stream(on_transcript)
+            )
+            logger.info("STT WebSocket stream connected")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to open STT stream: {e}")
+            self._stt_ws = None
+            return False
+
+    async def send_audio(self, audio_data: bytes) -> bool:
+        """Send one audio frame over the STT stream.
+
+        Returns False when no stream is up, so callers can fall back to
+        the per-chunk HTTP path.
+        """
+        if self._stt_ws is None:
+            return False
+        try:
+            await self._stt_ws.send(audio_data)
+            return True
+        except Exception as e:
+            logger.error(f"STT stream send failed: {e}")
+            self._stt_ws = None
+            return False
+
+    async def _read_stt_stream(self, on_transcript: Callable):
+        """Consume recognition frames and forward final transcripts."""
+        try:
+            async for message in self._stt_ws:
+                if isinstance(message, bytes):
+                    continue
+                frame = orjson.loads(message)
+                if 'error' in frame:
+                    logger.error(f"STT stream error: {frame['error']}")
+                    continue
+                for result in frame.get('results', []):
+                    if not result.get('final', False):
+                        continue
+                    transcript = (
+                        result.get('alternatives', [{}])[0]
+                        .get('transcript', '')
+                        .strip()
+                    )
+                    if transcript:
+                        await on_transcript(transcript)
+        except websockets.ConnectionClosed:
+            logger.info("STT WebSocket stream closed")
+        except Exception as e:
+            logger.error(f"Error reading STT stream: {e}")
+
+    async def close_stt_stream(self):
+        """Stop recognition and close the STT WebSocket."""
+        if self._stt_ws is not None:
+            try:
+                await self._stt_ws.send(orjson.dumps({'action': 'stop'}).decode())
+                await self._stt_ws.close()
+            except Exception as e:
+                logger.debug(f"Error closing STT stream: {e}")
+            self._stt_ws = None
+        if self._stt_reader_task is not None:
+            self._stt_reader_task.cancel()
+            self._stt_reader_task = None
+
+    async def transcribe_audio(self, audio_data: bytes,
+                               content_type: Optional[str] = None) -> str:
         """
         Transcribe audio data using Granite Speech model.
-        
+
         Args:
             audio_data: Raw audio bytes
-            
+            content_type: MIME type of the audio; defaults to raw PCM16
+
         Returns:
             Transcribed text
         """
         try:
             # Note: This is a simplified version. The actual implementation
             # will depend on the specific Watson Speech API endpoint
-            
+
             headers = {
-                'Authorization': f'Bearer {self.config.WATSONX_API_KEY}',
-                'Content-Type': 'audio/wav',
+                # Headerless audio straight off the handler - no WAV wrapper
+                'Content-Type': content_type or f'audio/l16;rate={self.config.SAMPLE_RATE};channels=1',
                 'Accept': 'application/json'
             }
-            
+
             params = {
                 'model': self.config.SPEECH_MODEL,
                 'project_id': self.config.WATSONX_PROJECT_ID
             }
-            
-            # Make async request to Watson Speech API
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.config.WATSONX_URL}/v1/speech-to-text/recognize",
-                    headers=headers,
-                    params=params,
-                    data=audio_data
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        # Extract transcript from response
-                        transcript = result.get('results', [{}])[0].get('alternatives', [{}])[0].get('transcript', '')
-                        return transcript
-                    else:
-                        error_msg = await response.text()
-                        logger.error(f"Transcription failed: {error_msg}")
-                        return ""
+
+            # Make async request to Watson Speech API over the shared session
+            session = self._get_session()
+            async with session.post(
+                f"{self.config.WATSONX_URL}/v1/speech-to-text/recognize",
+                headers=headers,
+                params=params,
+                data=audio_data
+            ) as response:
+                if response.status == 200:
+                    # orjson parses the raw bytes directly - no utf-8
+                    # decode pass and a much faster parser than the
+                    # stdlib one aiohttp's .json() uses
+                    result = orjson.loads(await response.read())
+                    # Extract transcript from response
+                    transcript = result.get('results', [{}])[0].get('alternatives', [{}])[0].get('transcript', '')
+                    return transcript
+                else:
+                    error_msg = await response.text()
+                    logger.error(f"Transcription failed: {error_msg}")
+                    return ""
                         
         except Exception as e:
             logger.error(f"Error during transcription: {e}")
             return ""
     
+    async def transcribe_batch(self, audio_data: bytes,
+                               content_type: Optional[str] = None) -> str:
+        """
+        Transcribe a batch of audio via the asynchronous recognitions API.
+
+        One job can carry many seconds (up to 100 MB) of audio, so
+        batching chunks into a single request amortizes the HTTP and
+        auth overhead that dominates per-chunk calls.
+
+        Args:
+            audio_data: Raw audio bytes
+            content_type: MIME type of the audio; defaults to raw PCM16
+
+        Returns:
+            Transcribed text
+        """
+        try:
+            headers = {
+                'Content-Type': content_type or f'audio/l16;rate={self.config.SAMPLE_RATE};channels=1',
+                'Accept': 'application/json'
+            }
+            params = {
+                'model': self.config.SPEECH_MODEL,
+                'project_id': self.config.WATSONX_PROJECT_ID
+            }
+
+            session = self._get_session()
+            async with session.post(
+                f"{self.config.WATSONX_URL}/v1/recognitions",
+                headers=headers,
+                params=params,
+                data=audio_data
+            ) as response:
+                if response.status not in (200, 201):
+                    error_msg = await response.text()
+                    logger.error(f"Async recognition submit failed: {error_msg}")
+                    return ""
+                job = orjson.loads(await response.read())
+
+            job_id = job.get('id')
+            if not job_id:
+                logger.error(f"Async recognition submit returned no job id: {job}")
+                return ""
+
+            deadline = asyncio.get_running_loop().time() + STT_POLL_TIMEOUT
+            while asyncio.get_running_loop().time() < deadline:
+                await asyncio.sleep(STT_POLL_INTERVAL)
+                async with session.get(
+                    f"{self.config.WATSONX_URL}/v1/recognitions/{job_id}"
+                ) as response:
+                    if response.status != 200:
+                        error_msg = await response.text()
+                        logger.error(
+                            f"Async recognition poll failed "
+                            f"(HTTP {response.status}): {error_msg}"
+                        )
+                        return ""
+                    status_doc = orjson.loads(await response.read())
+
+                status = status_doc.get('status')
+                if status == 'completed':
+                    results = status_doc.get('results', [{}])[0].get('results', [])
+                    return " ".join(
+                        r.get('alternatives', [{}])[0].get('transcript', '').strip()
+                        for r in results
+                    ).strip()
+                if status == 'failed':
+                    logger.error(f"Async recognition job {job_id} failed")
+                    return ""
+
+            logger.error(
+                f"Async recognition job {job_id} did not finish within "
+                f"{STT_POLL_TIMEOUT:.0f}s, giving up"
+            )
+            return ""
+
+        except Exception as e:
+            logger.error(f"Error during batch transcription: {e}")
+            return ""
+
     async def get_embeddings(self, texts: list[str]) -> list[list[float]]:
         """
         Generate embeddings for text using Watson embeddings API.
@@ -95,48 +343,121 @@ class WatsonxClient:
             
         Returns:
             List of embedding vectors
+
+        Raises:
+            RuntimeError: If the embeddings endpoint returns an error.
+                Failing fast beats handing back zero vectors, which
+                would silently poison any FAISS index built from them.
         """
         try:
-            # Use the embeddings endpoint
-            embeddings = []
-            
-            for text in texts:
-                params = {
-                    "input": text,
-                    "model_id": "ibm/all-minilm-l12-v2",  # IBM's embedding model
-                    "project_id": self.config.WATSONX_PROJECT_ID
-                }
-                
-                # Note: Actual implementation would use the proper Watson API
-                # This is a placeholder for the structure
-                response = await self._make_embedding_request(params)
-                embeddings.append(response)
-            
+            model_id = "ibm/all-minilm-l12-v2"  # IBM's embedding model
+            embeddings: list = [None] * len(texts)
+
+            # Resolve cache hits first; only misses go over the network
+            misses = []
+            for i, text in enumerate(texts):
+                cache_key = (model_id, text.strip().lower())
+                cached = self._cache_get(cache_key)
+                if cached is not None:
+                    embeddings[i] = cached
+                else:
+                    misses.append(i)
+
+            if misses:
+                # Send texts in batches so the endpoint can amortize
+                # HTTP overhead and exploit batched inference, and run
+                # the batches concurrently over the pooled session
+                batches = [
+                    misses[start:start + EMBEDDING_BATCH_SIZE]
+                    for start in range(0, len(misses), EMBEDDING_BATCH_SIZE)
+                ]
+                pending_batches = [
+                    self._make_embedding_request({
+                        "inputs": [texts[i] for i in batch],
+                        "model_id": model_id,
+                        "project_id": self.config.WATSONX_PROJECT_ID
+                    })
+                    for batch in batches
+                ]
+                results = await asyncio.gather(*pending_batches)
+
+                for batch, vectors in zip(batches, results):
+                    for i, vector in zip(batch, vectors):
+                        cache_key = (model_id, texts[i].strip().lower())
+                        self._cache_put(cache_key, vector)
+                        embeddings[i] = vector
+
             return embeddings
-            
+
         except Exception as e:
             logger.error(f"Error generating embeddings: {e}")
-            return []
-    
-    async def _make_embedding_request(self, params: dict) -> list[float]:
-        """Make embedding request to Watson API."""
-        # Placeholder - actual implementation would make HTTP request
-        return [0.0] * 384  # Return dummy embedding
+            raise
+
+    def _cache_get(self, key: tuple) -> Optional[list[float]]:
+        """Look up a cached embedding, refreshing its LRU position."""
+        vector = self._embedding_cache.get(key)
+        if vector is None:
+            return None
+        self._embedding_cache.move_to_end(key)
+        return vector.astype(np.float32).tolist()
+
+    def _cache_put(self, key: tuple, embedding: list[float]):
+        """Store an embedding as float16, evicting the oldest entry if full."""
+        self._embedding_cache[key] = np.asarray(embedding, dtype=np.float16)
+        if len(self._embedding_cache) > EMBEDDING_CACHE_SIZE:
+            self._embedding_cache.popitem(last=False)
+
+    async def _make_embedding_request(self, params: dict) -> list[list[float]]:
+        """Make a batched embedding request to Watson API."""
+        # Goes over the same pooled session as transcription, so
+        # concurrent STT and embedding requests share keep-alive
+        # connections instead of opening new ones
+        session = self._get_session()
+        async with session.post(
+            f"{self.config.WATSONX_URL}/ml/v1/text/embeddings",
+            params={'version': '2024-01-01'},
+            json=params,
+            headers={'Content-Type': 'application/json', 'Accept': 'application/json'}
+        ) as response:
+            if response.status != 200:
+                error_msg = await response.text()
+                raise RuntimeError(
+                    f"Embedding request failed (HTTP {response.status}): {error_msg}"
+                )
+
+            result = orjson.loads(await response.read())
+            return [item['embedding'] for item in result.get('results', [])]
     
-    def test_connection(self) -> bool:
-        """Test connection to Watson services."""
+    def test_connection(self, deep: bool = False) -> bool:
+        """Test connection to Watson services.
+
+        The default check hits the model-listing endpoint, which verifies
+        credentials in a metadata request instead of booting a billable
+        generation. Pass deep=True to also run a one-token generate.
+        """
         try:
-            # Simple test to verify credentials
-            test_params = {
-                "prompt": "Test",
-                "max_new_tokens": 1
-            }
-            
-            # Try a simple generation to test connection
-            response = self.speech_model.generate(test_params)
+            response = requests.get(
+                f"{self.config.WATSONX_URL}/ml/v1/foundation_model_specs",
+                params={'version': '2024-01-01'},
+                headers={'Authorization': f'Bearer {self.config.WATSONX_API_KEY}'},
+                timeout=5
+            )
+            if response.status_code != 200:
+                logger.error(
+                    f"Watson connection test failed: HTTP {response.status_code}"
+                )
+                return False
+
+            if deep:
+                # Opt-in end-to-end check through the speech model
+                self.speech_model.generate({
+                    "prompt": "Test",
+                    "max_new_tokens": 1
+                })
+
             logger.info("Watson connection test successful")
             return True
-            
+
         except Exception as e:
             logger.error(f"Watson connection test failed: {e}")
             return False
@@ -0,0 +1,80 @@
+# src/rag/__init__.py
+import logging
+import os
+from functools import lru_cache
+
+import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer
+
+try:
+    from fastembed import TextEmbedding
+except ImportError:  # pragma: no cover - optional accelerator
+    TextEmbedding = None
+
+logger = logging.getLogger(__name__)
+
+
+class _FastEmbedAdapter:
+    """SentenceTransformer-shaped wrapper around fastembed's ONNX runtime.
+
+    fastembed ships int8-quantized ONNX exports that run 2-4x faster
+    than fp32 torch on CPU (VNNI int8 matmuls where the hardware has
+    them). Only the slice of the SentenceTransformer surface this
+    codebase touches is implemented.
+    """
+
+    def __init__(self, model_name: str):
+        self._model = TextEmbedding(model_name)
+        self.device = 'cpu'
+        # Probe once for the output dimension; fastembed does not
+        # expose it directly
+        self._dimension = int(next(self._model.embed(["probe"])).shape[0])
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._dimension
+
+    def encode(self, texts, batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, show_progress_bar: bool = False):
+        vectors = np.stack([
+            np.asarray(v, dtype=np.float32)
+            for v in self._model.embed(list(texts), batch_size=batch_size)
+        ])
+        if normalize_embeddings:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            np.divide(vectors, np.maximum(norms, 1e-12), out=vectors)
+        return vectors
+
+    def eval(self):
+        return self
+
+
+@lru_cache(maxsize=1)
+def get_embedder(model_name: str):
+    """Return the shared embedding model for the given model name.
+
+    DocumentProcessor and VectorStore both need the embedding model;
+    loading it once here keeps a single copy of the weights in RAM
+    instead of one per consumer. On CPU the int8 ONNX path is preferred
+    when fastembed is installed; on GPU (or when fastembed is missing
+    or does not know the model) the fp16/fp32 torch path is used.
+    """
+    # Leave headroom for the audio callback and Ollama client threads
+    # instead of letting torch claim every core
+    torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+
+    if device == 'cpu' and TextEmbedding is not None:
+        try:
+            return _FastEmbedAdapter(model_name)
+        except Exception as e:
+            logger.info(f"fastembed unavailable for {model_name}: {e}")
+
+    model = SentenceTransformer(model_name, device=device)
+    if device == 'cuda':
+        # fp16 halves memory bandwidth on GPU with no meaningful
+        # quality loss for MiniLM embeddings
+        model = model.half()
+    model.eval()
+    return model
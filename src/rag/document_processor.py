@@ -1,41 +1,64 @@
 # src/rag/document_processor.py
 import logging
+import os
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 import re
-from sentence_transformers import SentenceTransformer
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 import pickle
 from config.config import Config
+from src.rag import get_embedder
 
 logger = logging.getLogger(__name__)
 
+# Number of chunks encoded per batch during data preparation
+EMBED_BATCH_SIZE = 256
+
+# Precompiled splitters - compiled once instead of on every document
+_SECTION_RE = re.compile(r'\n\n+|(?=\d+\.\s+[A-Z])|(?=Section \d+)')
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+
 class DocumentProcessor:
     """Process compliance documents for RAG pipeline."""
     
     def __init__(self):
         self.config = Config()
-        self.embedding_model = SentenceTransformer(self.config.EMBEDDING_MODEL)
+        # Shared embedder - same instance as VectorStore, loaded once
+        # (get_embedder picks GPU and fp16 when available)
+        self.embedding_model = get_embedder(self.config.EMBEDDING_MODEL)
+        self._device = str(self.embedding_model.device).split(':')[0]
     
     def load_documents(self) -> List[Dict[str, str]]:
         """Load all compliance documents from the directory."""
+        paths = [
+            entry.path for entry in os.scandir(self.config.COMPLIANCE_DOCS_DIR)
+            if entry.is_file() and entry.name.endswith('.txt')
+        ]
+
+        # File reads are I/O-bound and release the GIL, so a thread pool
+        # overlaps disk latency instead of serializing it per file
         documents = []
-        
-        # Process all text files in compliance directory
-        for file_path in self.config.COMPLIANCE_DOCS_DIR.glob("*.txt"):
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    
-                documents.append({
-                    'source': file_path.name,
-                    'content': content
-                })
-                logger.info(f"Loaded document: {file_path.name}")
-                
-            except Exception as e:
-                logger.error(f"Error loading {file_path}: {e}")
-        
+        if paths:
+            with ThreadPoolExecutor(max_workers=min(16, len(paths))) as executor:
+                for doc in executor.map(self._read_document, paths):
+                    if doc is not None:
+                        documents.append(doc)
+
         return documents
+
+    def _read_document(self, path: str) -> Optional[Dict[str, str]]:
+        """Read one document file, returning None on failure."""
+        try:
+            content = Path(path).read_text(encoding='utf-8')
+            logger.info(f"Loaded document: {os.path.basename(path)}")
+            return {
+                'source': os.path.basename(path),
+                'content': content
+            }
+        except Exception as e:
+            logger.error(f"Error loading {path}: {e}")
+            return None
     
     def chunk_documents(self, documents: List[Dict[str, str]]) -> List[Dict[str, any]]:
         """
@@ -71,55 +94,87 @@ class DocumentProcessor:
     def _split_into_sections(self, text: str) -> List[str]:
         """Split text into semantic sections."""
         # Split by multiple newlines or section headers
-        sections = re.split(r'\n\n+|(?=\d+\.\s+[A-Z])|(?=Section \d+)', text)
-        
+        sections = _SECTION_RE.split(text)
+
         # Further split very long sections
         final_sections = []
         for section in sections:
             if len(section) > 1000:
-                # Split by sentences
-                sentences = re.split(r'(?<=[.!?])\s+', section)
-                current_chunk = ""
-                
+                # Split by sentences, accumulating into a list so each
+                # chunk is joined once instead of rebuilt per sentence
+                sentences = _SENTENCE_RE.split(section)
+                current_chunk = []
+                current_len = 0
+
                 for sentence in sentences:
-                    if len(current_chunk) + len(sentence) < 800:
-                        current_chunk += sentence + " "
+                    if current_len + len(sentence) < 800:
+                        current_chunk.append(sentence)
+                        current_len += len(sentence) + 1
                     else:
                         if current_chunk:
-                            final_sections.append(current_chunk.strip())
-                        current_chunk = sentence + " "
-                
+                            final_sections.append(" ".join(current_chunk).strip())
+                        current_chunk = [sentence]
+                        current_len = len(sentence) + 1
+
                 if current_chunk:
-                    final_sections.append(current_chunk.strip())
+                    final_sections.append(" ".join(current_chunk).strip())
             else:
                 final_sections.append(section)
-        
+
         return final_sections
     
-    def generate_embeddings(self, chunks: List[Dict[str, any]]) -> Tuple[List[List[float]], List[Dict[str, any]]]:
+    def generate_embeddings(self, chunks: List[Dict[str, any]]) -> Tuple[np.ndarray, List[Dict[str, any]]]:
         """
         Generate embeddings for all chunks.
-        
+
         Args:
             chunks: List of text chunks with metadata
-            
+
         Returns:
-            Tuple of (embeddings, chunks)
+            Tuple of (float32 embeddings array, chunks)
         """
         texts = [chunk['text'] for chunk in chunks]
         
         logger.info(f"Generating embeddings for {len(texts)} chunks...")
-        embeddings = self.embedding_model.encode(texts, show_progress_bar=True)
-        
-        return embeddings.tolist(), chunks
+
+        batches = [
+            texts[start:start + EMBED_BATCH_SIZE]
+            for start in range(0, len(texts), EMBED_BATCH_SIZE)
+        ]
+
+        if self._device == 'cuda' or len(batches) <= 1:
+            # Batch encoding lets SBERT exploit vectorized matmuls; on GPU
+            # a single call keeps the device fed without thread contention
+            embeddings = self._encode_batch(texts, show_progress_bar=True)
+        else:
+            # On CPU, encode batches on a thread pool - torch releases the
+            # GIL during the forward pass, so batches overlap
+            with ThreadPoolExecutor(max_workers=min(4, len(batches))) as executor:
+                parts = list(executor.map(self._encode_batch, batches))
+            embeddings = np.vstack(parts)
+
+        # float32 keeps FAISS happy regardless of the encode dtype
+        return np.asarray(embeddings, dtype=np.float32), chunks
+
+    def _encode_batch(self, texts: List[str], show_progress_bar: bool = False) -> np.ndarray:
+        """Encode one batch of texts into normalized embeddings."""
+        # Normalized vectors make downstream cosine/IP scoring a plain
+        # dot product
+        return self.embedding_model.encode(
+            texts,
+            batch_size=EMBED_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=show_progress_bar
+        )
     
-    def save_processed_data(self, embeddings: List[List[float]], chunks: List[Dict[str, any]]):
+    def save_processed_data(self, embeddings: np.ndarray, chunks: List[Dict[str, any]]):
         """Save processed embeddings and chunks."""
-        # Save embeddings
-        embeddings_path = self.config.PROCESSED_DIR / 'embeddings.pkl'
-        with open(embeddings_path, 'wb') as f:
-            pickle.dump(embeddings, f)
-        
+        # Save embeddings as .npy - mmap-able on load and far smaller
+        # than a pickled list of Python floats
+        embeddings_path = self.config.PROCESSED_DIR / 'embeddings.npy'
+        np.save(embeddings_path, np.asarray(embeddings, dtype=np.float32))
+
         # Save chunks
         chunks_path = self.config.PROCESSED_DIR / 'chunks.pkl'
         with open(chunks_path, 'wb') as f:
@@ -0,0 +1,104 @@
+# src/rag/semantic_cache.py
+import logging
+import time
+import numpy as np
+import faiss
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Hard cap on cached verdicts; the index is rebuilt without the oldest
+# half when it is reached
+MAX_ENTRIES = 500
+
+class SemanticCache:
+    """Embedding-keyed cache of analysis verdicts.
+
+    Compliance conversations repeat near-identical phrasing ("I guarantee
+    you returns", "trust me, this is risk-free"). Instead of paying a full
+    RAG lookup + LLM generation for each repeat, verdicts are stored
+    against normalized utterance embeddings in a small inner-product FAISS
+    index and returned directly when a new utterance is close enough.
+    """
+
+    def __init__(self, dimension: int, namespace: str = '',
+                 threshold: float = 0.92, cluster_threshold: float = 0.86,
+                 ttl_seconds: float = 600.0):
+        self.namespace = namespace
+        # Minimum cosine similarity for a cache hit
+        self.threshold = threshold
+        # New vectors are only added when they are farther than this from
+        # every stored centroid, keeping the index small
+        self.cluster_threshold = cluster_threshold
+        self.ttl_seconds = ttl_seconds
+        self.index = faiss.IndexFlatIP(dimension)
+        # Parallel to the index rows
+        self.entries: List[Dict[str, any]] = []
+
+    def get(self, vector: np.ndarray) -> Optional[Dict[str, any]]:
+        """Return the cached verdict nearest to vector, if similar enough.
+
+        Args:
+            vector: Normalized float32 utterance embedding
+
+        Returns:
+            A copy of the cached verdict, or None on miss/expiry
+        """
+        if self.index.ntotal == 0:
+            return None
+
+        distances, indices = self.index.search(vector.reshape(1, -1), 1)
+        score, idx = float(distances[0][0]), int(indices[0][0])
+        if idx < 0 or score < self.threshold:
+            return None
+
+        entry = self.entries[idx]
+        if time.time() - entry['added_at'] > self.ttl_seconds:
+            return None
+
+        logger.debug(f"Semantic cache hit (score={score:.3f})")
+        return dict(entry['verdict'])
+
+    def put(self, vector: np.ndarray, verdict: Dict[str, any]):
+        """Cache a verdict, adding a centroid only for novel phrasing."""
+        if self.index.ntotal > 0:
+            distances, indices = self.index.search(vector.reshape(1, -1), 1)
+            if float(distances[0][0]) >= self.cluster_threshold:
+                # Close enough to an existing centroid - refresh it in
+                # place instead of growing the index. Storing the fresh
+                # verdict and timestamp also revives clusters whose
+                # entry has passed the TTL; a bare return here would
+                # leave an expired centroid blocking its whole
+                # neighborhood from ever caching again.
+                entry = self.entries[int(indices[0][0])]
+                entry['verdict'] = dict(verdict)
+                entry['added_at'] = time.time()
+                return
+
+        if self.index.ntotal >= MAX_ENTRIES:
+            self._evict_oldest()
+
+        self.index.add(vector.reshape(1, -1))
+        self.entries.append({
+            'verdict': dict(verdict),
+            'vector': np.array(vector, dtype=np.float32).reshape(-1),
+            'added_at': time.time()
+        })
+
+    def _evict_oldest(self):
+        """Drop the oldest half of the cache and rebuild the index.
+
+        IndexFlatIP has no per-row removal, so eviction rebuilds from the
+        kept entries. Halving amortizes the rebuild to once per ~250
+        inserts instead of once per insert at the cap.
+        """
+        keep = sorted(self.entries, key=lambda e: e['added_at'])[len(self.entries) // 2:]
+        self.index.reset()
+        self.entries = keep
+        if keep:
+            self.index.add(np.stack([e['vector'] for e in keep]))
+
+    def clear(self):
+        """Drop all cached verdicts."""
+        self.index.reset()
+        self.entries.clear()
@@ -1,69 +1,159 @@
 # src/rag/vector_store.py
 import logging
 import pickle
+import sqlite3
+from collections import OrderedDict
+from pathlib import Path
 import numpy as np
 import faiss
-from typing import List, Dict, Tuple, Optional
-from sentence_transformers import SentenceTransformer
+from typing import List, Dict, Tuple, Optional, Union
 from config.config import Config
+from src.rag import get_embedder
 
 logger = logging.getLogger(__name__)
 
+# Below this many vectors an exhaustive scan is already fast and exact,
+# so the approximate HNSW graph is only built for larger corpora
+HNSW_MIN_VECTORS = 5000
+
 class VectorStore:
     """FAISS-based vector store for RAG retrieval."""
     
     def __init__(self):
         self.config = Config()
-        self.embedding_model = SentenceTransformer(self.config.EMBEDDING_MODEL)
+        # Shared embedder - same instance as DocumentProcessor, so the
+        # model weights are loaded once per process
+        self.embedding_model = get_embedder(self.config.EMBEDDING_MODEL)
         self.index = None
         self.chunks = []
-        self.embeddings = []
+        # Lazy chunk-metadata store: when loaded from disk, chunk text is
+        # fetched from SQLite per search hit instead of held in RAM
+        self._chunks_db = None
+        # LRU cache of query embeddings (float16) keyed by normalized text,
+        # so repeated queries skip the SentenceTransformer forward pass
+        self._query_cache = OrderedDict()
     
-    def build_index(self, embeddings: List[List[float]], chunks: List[Dict[str, any]]):
+    def build_index(self, embeddings: Union[np.ndarray, List[List[float]], str, Path],
+                    chunks: List[Dict[str, any]]):
         """
         Build FAISS index from embeddings.
-        
+
         Args:
-            embeddings: List of embedding vectors
+            embeddings: Embedding matrix, list of vectors, or path to a
+                saved .npy file (loaded via mmap)
             chunks: List of text chunks with metadata
         """
-        # Convert to numpy array
-        embeddings_array = np.array(embeddings).astype('float32')
-        
-        # Create FAISS index
+        if isinstance(embeddings, (str, Path)):
+            # Memory-map the saved matrix; pages are only read as they
+            # are copied into the index
+            embeddings = np.load(embeddings, mmap_mode='r')
+
+        # Convert to numpy array (normalize_L2 below works in place, so
+        # this must be a writable copy)
+        embeddings_array = np.array(embeddings, dtype=np.float32)
+
         dimension = embeddings_array.shape[1]
-        self.index = faiss.IndexFlatL2(dimension)
+
+        # L2-normalize so inner product equals cosine similarity; scores
+        # returned by search are then directly comparable across queries
+        faiss.normalize_L2(embeddings_array)
+
+        if embeddings_array.shape[0] >= HNSW_MIN_VECTORS:
+            # HNSW graph search is sub-linear in corpus size, and 8-bit
+            # scalar quantization cuts vector storage 4x vs float32, so
+            # more of the index stays cache-resident as the corpus grows
+            self.index = faiss.IndexHNSWSQ(
+                dimension, faiss.ScalarQuantizer.QT_8bit, 32,
+                faiss.METRIC_INNER_PRODUCT
+            )
+            self.index.hnsw.efConstruction = 200
+            self.index.hnsw.efSearch = 64
+            self.index.train(embeddings_array)
+        else:
+            # Small corpus: the fp16 scalar quantizer stores vectors at
+            # half the memory of a flat float32 index, with negligible
+            # recall loss for 384-dim MiniLM embeddings
+            self.index = faiss.IndexScalarQuantizer(
+                dimension, faiss.ScalarQuantizer.QT_fp16,
+                faiss.METRIC_INNER_PRODUCT
+            )
+            self.index.train(embeddings_array)
+
         self.index.add(embeddings_array)
         
-        # Store chunks and embeddings
+        # Store chunks; FAISS owns the vectors from here on
         self.chunks = chunks
-        self.embeddings = embeddings
-        
+
         logger.info(f"Built FAISS index with {len(chunks)} vectors")
     
     def save_index(self):
         """Save FAISS index and associated data."""
         # Save FAISS index
         faiss.write_index(self.index, str(self.config.VECTOR_STORE_PATH))
-        
-        # Save chunks
-        chunks_path = self.config.PROCESSED_DIR / 'vector_store_chunks.pkl'
-        with open(chunks_path, 'wb') as f:
-            pickle.dump(self.chunks, f)
-        
+
+        # Save chunk metadata to SQLite keyed by FAISS id, so search-time
+        # lookups stay lazy instead of loading every chunk at startup
+        chunks_path = self.config.PROCESSED_DIR / 'vector_store_chunks.db'
+        if chunks_path.exists():
+            chunks_path.unlink()
+
+        db = sqlite3.connect(chunks_path)
+        db.execute(
+            "CREATE TABLE chunks("
+            "id INTEGER PRIMARY KEY, text TEXT, source TEXT, "
+            "chunk_id TEXT, chunk_index INTEGER)"
+        )
+        db.executemany(
+            "INSERT INTO chunks VALUES (?, ?, ?, ?, ?)",
+            [
+                (i, chunk['text'], chunk['source'], chunk['chunk_id'],
+                 chunk['metadata']['chunk_index'])
+                for i, chunk in enumerate(self.chunks)
+            ]
+        )
+        db.commit()
+        db.close()
+
         logger.info(f"Saved vector store to {self.config.VECTOR_STORE_PATH}")
     
     def load_index(self):
         """Load FAISS index from disk."""
         try:
-            # Load FAISS index
-            self.index = faiss.read_index(str(self.config.VECTOR_STORE_PATH))
-            
-            # Load chunks
-            chunks_path = self.config.PROCESSED_DIR / 'vector_store_chunks.pkl'
-            with open(chunks_path, 'rb') as f:
-                self.chunks = pickle.load(f)
-            
+            # Load FAISS index, memory-mapped when the index type supports
+            # it so the OS pages in only what search touches instead of
+            # reading the whole file into RAM on every start
+            try:
+                self.index = faiss.read_index(
+                    str(self.config.VECTOR_STORE_PATH),
+                    faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+                )
+            except RuntimeError:
+                self.index = faiss.read_index(str(self.config.VECTOR_STORE_PATH))
+
+            # Move the index to GPU when a CUDA-enabled faiss build is
+            # installed. Not every index type has a GPU counterpart
+            # (HNSW in particular does not), so failures keep the CPU
+            # index rather than second-guessing faiss's capabilities.
+            if hasattr(faiss, 'get_num_gpus') and faiss.get_num_gpus() > 0:
+                try:
+                    self.index = faiss.index_cpu_to_all_gpus(self.index)
+                    logger.info("Moved FAISS index to GPU")
+                except Exception as e:
+                    logger.debug(f"Keeping FAISS index on CPU: {e}")
+
+            # Open the chunk metadata store; rows are fetched per search
+            # hit rather than loaded up front
+            chunks_db_path = self.config.PROCESSED_DIR / 'vector_store_chunks.db'
+            if chunks_db_path.exists():
+                self._chunks_db = sqlite3.connect(
+                    chunks_db_path, check_same_thread=False
+                )
+            else:
+                # Fall back to the legacy pickle format
+                chunks_path = self.config.PROCESSED_DIR / 'vector_store_chunks.pkl'
+                with open(chunks_path, 'rb') as f:
+                    self.chunks = pickle.load(f)
+
             logger.info("Loaded vector store from disk")
             return True
             
@@ -71,54 +161,121 @@ class VectorStore:
             logger.error(f"Error loading vector store: {e}")
             return False
     
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        Encode a query into a normalized float32 vector.
+
+        Cached per normalized query text, so callers can compute the
+        vector once and share it between search and the semantic cache.
+        """
+        cache_key = query.strip().lower()
+        cached = self._query_cache.get(cache_key)
+        if cached is not None:
+            self._query_cache.move_to_end(cache_key)
+            query_embedding = cached.astype('float32')
+        else:
+            query_embedding = self.embedding_model.encode([query])
+            query_embedding = query_embedding.astype('float32')
+            self._query_cache[cache_key] = query_embedding.astype(np.float16)
+            if len(self._query_cache) > 1024:
+                self._query_cache.popitem(last=False)
+
+        # Normalize the query the same way as the indexed vectors
+        faiss.normalize_L2(query_embedding)
+        return query_embedding
+
     def search(self, query: str, top_k: int = None) -> List[Dict[str, any]]:
         """
         Search for relevant chunks based on query.
-        
+
         Args:
             query: Search query text
             top_k: Number of results to return
-            
+
+        Returns:
+            List of relevant chunks with scores
+        """
+        return self.search_vec(self.embed_query(query), top_k)
+
+    def search_vec(self, query_embedding: np.ndarray, top_k: int = None) -> List[Dict[str, any]]:
+        """
+        Search for relevant chunks with a precomputed query vector.
+
+        Args:
+            query_embedding: Normalized float32 query vector
+            top_k: Number of results to return
+
         Returns:
             List of relevant chunks with scores
         """
         if self.index is None:
             logger.error("Vector store index not initialized")
             return []
-        
+
         if top_k is None:
             top_k = self.config.TOP_K_RETRIEVAL
-        
-        # Generate query embedding
-        query_embedding = self.embedding_model.encode([query])
-        query_embedding = query_embedding.astype('float32')
-        
+
         # Search in FAISS
-        distances, indices = self.index.search(query_embedding, top_k)
-        
+        distances, indices = self.index.search(query_embedding.reshape(1, -1), top_k)
+
         # Prepare results
         results = []
+        chunk_map = self._fetch_chunks([int(idx) for idx in indices[0] if idx >= 0])
         for i, (dist, idx) in enumerate(zip(distances[0], indices[0])):
-            if idx < len(self.chunks):
-                chunk = self.chunks[idx].copy()
-                chunk['score'] = float(1 / (1 + dist))  # Convert distance to similarity score
+            chunk = chunk_map.get(int(idx))
+            if chunk is not None:
+                chunk['score'] = float(dist)  # Inner product of normalized vectors = cosine
                 chunk['rank'] = i + 1
                 results.append(chunk)
-        
+
         return results
+
+    def _fetch_chunks(self, ids: List[int]) -> Dict[int, Dict[str, any]]:
+        """Fetch chunk metadata for the given FAISS ids."""
+        if self.chunks:
+            return {
+                i: self.chunks[i].copy() for i in ids if i < len(self.chunks)
+            }
+
+        if self._chunks_db is None or not ids:
+            return {}
+
+        placeholders = ','.join('?' * len(ids))
+        rows = self._chunks_db.execute(
+            f"SELECT id, text, source, chunk_id, chunk_index "
+            f"FROM chunks WHERE id IN ({placeholders})",
+            ids
+        ).fetchall()
+
+        return {
+            row[0]: {
+                'text': row[1],
+                'source': row[2],
+                'chunk_id': row[3],
+                'metadata': {
+                    'source_file': row[2],
+                    'chunk_index': row[4]
+                }
+            }
+            for row in rows
+        }
     
-    def get_context_for_query(self, query: str) -> str:
+    def get_context_for_query(self, query: str, query_vec: Optional[np.ndarray] = None) -> str:
         """
         Get formatted context for a query.
-        
+
         Args:
             query: Search query
-            
+            query_vec: Optional precomputed query vector (skips re-encoding)
+
         Returns:
             Formatted context string
         """
-        results = self.search(query)
-        
+        if query_vec is not None:
+            results = self.search_vec(query_vec)
+        else:
+            results = self.search(query)
+
         if not results:
             return "No relevant compliance rules found."
         
@@ -2,7 +2,12 @@
 import streamlit as st
 import asyncio
 import logging
+import sys
+import threading
+import time
+from collections import deque
 from datetime import datetime
+from itertools import islice
 import json
 from typing import Optional
 
@@ -18,6 +23,19 @@ from config.config import Config
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Seconds of audio coalesced into one async recognition job when the
+# WebSocket stream is unavailable
+BATCH_SECONDS = 5
+
+# Utterances of conversation history offered to the Worker as context.
+# Prompt tokens scale with this window, so keeping it fixed makes
+# per-utterance LLM cost constant instead of growing with the session.
+CONTEXT_WINDOW = 8
+
+# Maximum transcripts analyzed with a single batched Worker call when
+# transcription gets ahead of analysis
+ANALYSIS_BATCH_MAX = 8
+
 # Page config
 st.set_page_config(
     page_title="Aegis - Real-time Compliance Guardian",
@@ -25,6 +43,23 @@ st.set_page_config(
     layout="wide"
 )
 
+# Heavy resources (Watson client, embedding model, FAISS index) are cached
+# across Streamlit reruns so they are loaded once per process instead of
+# on every script re-execution.
+
+@st.cache_resource
+def get_watsonx_client() -> WatsonxClient:
+    """Return the shared Watson client."""
+    return WatsonxClient()
+
+@st.cache_resource
+def get_vector_store() -> Optional[VectorStore]:
+    """Return the shared vector store with its FAISS index loaded."""
+    vector_store = VectorStore()
+    if not vector_store.load_index():
+        return None
+    return vector_store
+
 class AegisApp:
     """Main Aegis application class."""
     
@@ -35,36 +70,82 @@ class AegisApp:
         self.guardian_agent = None
         self.audio_handler = None
         self.vector_store = None
-        
+        # One asyncio loop on a daemon thread owns all audio and network
+        # I/O. It outlives Streamlit reruns (the app object is cached),
+        # so WebSocket/HTTP connections and in-flight tasks survive a
+        # script re-execution instead of being torn down with its loop.
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(
+            target=self._loop.run_forever, daemon=True, name='aegis-io-loop'
+        ).start()
+        # Set once the STT WebSocket stream is up; cleared on send
+        # failure so the HTTP path takes over
+        self._stt_connected = False
+        # Accumulates fallback-path audio until a batch is worth one
+        # async recognition job
+        self._audio_buffer = bytearray()
+        # Bounded hand-off between audio capture and chunk processing,
+        # so a slow Watson call never stalls the capture path; oldest
+        # chunks are dropped under sustained backpressure
+        self._chunk_queue = asyncio.Queue(maxsize=32)
+        self._dispatcher_task = None
+        # Sequence bookkeeping so concurrently transcribed fallback
+        # batches still enter the transcript in capture order
+        self._batch_seq = 0
+        self._next_emit_seq = 0
+        self._pending_transcripts = {}
+        # Finalized transcripts waiting for compliance analysis; the
+        # analyzer drains backlogs into batched Worker calls
+        self._transcript_queue = asyncio.Queue()
+        self._analysis_task = None
+        # Pipeline results live on the app, not in st.session_state: the
+        # pipeline coroutines run on the I/O loop's thread, where there
+        # is no script-run context and Streamlit hands back a throwaway
+        # session state, silently discarding every write. The fragments
+        # read these under the lock at render time instead. Bounded, as
+        # the UI renders only the tail of each; the running totals
+        # survive deque eviction so the sidebar metrics cover the whole
+        # session rather than the retained tail.
+        self._results_lock = threading.Lock()
+        self._transcript_log = deque(maxlen=200)
+        self._alert_log = deque(maxlen=100)
+        self._total_transcripts = 0
+        self._total_alerts = 0
+        # Bounded: only the last CONTEXT_WINDOW utterances ever reach a
+        # prompt, so there is no point keeping more
+        self._history = deque(maxlen=CONTEXT_WINDOW)
+
         # Initialize session state
-        if 'transcript' not in st.session_state:
-            st.session_state.transcript = []
-        if 'alerts' not in st.session_state:
-            st.session_state.alerts = []
+        self.init_session_state()
+
+    def init_session_state(self):
+        """Ensure session-state defaults exist.
+
+        Called per rerun from main() as well: the app object itself is
+        cached across sessions, but session_state is per browser session.
+        """
         if 'is_recording' not in st.session_state:
             st.session_state.is_recording = False
-        if 'conversation_history' not in st.session_state:
-            st.session_state.conversation_history = []
     
     def initialize_components(self):
         """Initialize all components."""
         with st.spinner("Initializing Aegis components..."):
             try:
-                # Initialize vector store
-                self.vector_store = VectorStore()
-                if not self.vector_store.load_index():
+                # Initialize vector store (cached across reruns)
+                self.vector_store = get_vector_store()
+                if self.vector_store is None:
                     st.error("Failed to load vector store. Please run data preparation first.")
                     return False
-                
-                # Initialize Watson client
-                self.watson_client = WatsonxClient()
+
+                # Initialize Watson client (cached across reruns)
+                self.watson_client = get_watsonx_client()
                 
                 # Initialize agents
                 self.worker_agent = WorkerAgent(self.vector_store)
                 self.guardian_agent = GuardianAgent()
                 
-                # Initialize audio handler
-                self.audio_handler = AudioHandler(self.on_audio_chunk)
+                # Initialize audio handler on the background I/O loop
+                self.audio_handler = AudioHandler(self.on_audio_chunk, loop=self._loop)
                 
                 st.success("✅ All components initialized successfully!")
                 return True
@@ -75,44 +156,191 @@ class AegisApp:
                 return False
     
     async def on_audio_chunk(self, audio_data: bytes):
-        """Handle incoming audio chunks."""
+        """Enqueue an audio chunk for processing."""
+        if self._dispatcher_task is None or self._dispatcher_task.done():
+            self._dispatcher_task = asyncio.get_running_loop().create_task(
+                self._dispatch_chunks()
+            )
         try:
-            # Transcribe audio
-            transcript = await self.watson_client.transcribe_audio(audio_data)
-            
-            if transcript:
-                # Add to transcript
-                timestamp = datetime.now().strftime("%H:%M:%S")
-                st.session_state.transcript.append({
-                    'time': timestamp,
+            self._chunk_queue.put_nowait(audio_data)
+        except asyncio.QueueFull:
+            # Drop the oldest chunk: staying near-real-time on fresh
+            # audio beats replaying a backlog
+            try:
+                self._chunk_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            self._chunk_queue.put_nowait(audio_data)
+
+    async def _dispatch_chunks(self):
+        """Drain the chunk queue and process chunks in capture order.
+
+        A single dispatcher keeps audio frames ordered (the STT stream
+        needs them in sequence); the expensive work - batch recognition
+        jobs and transcript analysis - runs in separate tasks, so the
+        dispatcher itself only does fast sends and buffer appends.
+        """
+        while True:
+            audio_data = await self._chunk_queue.get()
+            try:
+                await self._process_chunk(audio_data)
+            except Exception as e:
+                logger.error(f"Error processing audio chunk: {e}")
+            finally:
+                self._chunk_queue.task_done()
+
+    async def _process_chunk(self, audio_data: bytes):
+        """Route one audio chunk to the STT stream or the batch buffer."""
+        # Preferred path: stream the frame over the persistent STT
+        # WebSocket - transcripts come back through _on_transcript
+        # via the stream reader, with no per-chunk HTTP round-trip
+        if not self._stt_connected:
+            self._stt_connected = await self.watson_client.connect_stt_stream(
+                self._on_transcript,
+                content_type=self.audio_handler.content_type
+            )
+        if self._stt_connected and await self.watson_client.send_audio(audio_data):
+            return
+        self._stt_connected = False
+
+        # Fallback: coalesce chunks and submit them as one async
+        # recognition job instead of an HTTP request per chunk. The
+        # job runs as its own task so the next chunks keep flowing
+        # while Watson works.
+        self._audio_buffer.extend(audio_data)
+        # Byte rate depends on the handler's wire format (mu-law is one
+        # byte per sample, PCM16 two), so the threshold comes from the
+        # handler rather than hard-coding a sample width
+        if len(self._audio_buffer) >= self.audio_handler.bytes_per_second * BATCH_SECONDS:
+            asyncio.get_running_loop().create_task(self._flush_audio_buffer())
+
+    async def _flush_audio_buffer(self):
+        """Transcribe and drain the buffered fallback audio."""
+        if not self._audio_buffer:
+            return
+        batch = bytes(self._audio_buffer)
+        self._audio_buffer.clear()
+
+        # Concurrent jobs can finish out of order; the sequence number
+        # holds each result until all earlier batches have been emitted
+        seq = self._batch_seq
+        self._batch_seq += 1
+        transcript = await self.watson_client.transcribe_batch(
+            batch, content_type=self.audio_handler.content_type
+        )
+        self._pending_transcripts[seq] = transcript
+
+        while self._next_emit_seq in self._pending_transcripts:
+            ready = self._pending_transcripts.pop(self._next_emit_seq)
+            self._next_emit_seq += 1
+            if ready:
+                await self._on_transcript(ready)
+
+    async def _on_transcript(self, transcript: str):
+        """Record one finalized transcript and queue it for analysis."""
+        try:
+            # Add to transcript. Only the raw timestamp is stored;
+            # strftime runs at render time for the handful of visible
+            # rows instead of for every entry
+            ts = time.time()
+            with self._results_lock:
+                self._transcript_log.append({
+                    'ts': ts,
                     'text': transcript
                 })
-                
-                # Update conversation history
-                st.session_state.conversation_history.append(transcript)
-                
-                # Analyze for compliance
-                analysis = await self.worker_agent.analyze_utterance(
-                    transcript,
-                    context=st.session_state.conversation_history[:-1]
+                self._total_transcripts += 1
+
+                # Snapshot the context before the new transcript enters
+                # the history: that makes the snapshot "everything before
+                # this utterance" by construction, with no [:-1] slice of
+                # a copy
+                history = self._history
+                context = tuple(history)
+
+                # Update conversation history, skipping consecutive
+                # repeats (STT sometimes re-finalizes the same phrase) so
+                # they do not burn context-window slots
+                if not history or history[-1] != transcript:
+                    history.append(transcript)
+
+            # Deterministic fast path: utterances with no possible risk
+            # signal never enter the analyzer queue - no retrieval, no
+            # LLM, no Guardian prewarm
+            if self.worker_agent.is_obviously_safe(transcript):
+                return
+
+            # Hand off to the analyzer; transcription never waits on
+            # the LLMs
+            if self._analysis_task is None or self._analysis_task.done():
+                self._analysis_task = asyncio.get_running_loop().create_task(
+                    self._analyze_transcripts()
                 )
-                
-                # If risk detected, get guardian review
-                if analysis['risk_detected']:
-                    analysis = await self.guardian_agent.review_alert(
-                        analysis,
-                        transcript
-                    )
-                    
-                    # Add alert
-                    st.session_state.alerts.append({
-                        'time': timestamp,
-                        'original': transcript,
-                        'analysis': analysis
-                    })
-                
+            self._transcript_queue.put_nowait((ts, transcript, context))
+
         except Exception as e:
-            logger.error(f"Error processing audio chunk: {e}")
+            logger.error(f"Error processing transcript: {e}")
+
+    async def _analyze_transcripts(self):
+        """Drain queued transcripts through the Worker, batching backlogs.
+
+        When transcription gets ahead of analysis (e.g. after a pause),
+        up to ANALYSIS_BATCH_MAX pending utterances are folded into one
+        batched Worker call instead of paying a full generate each.
+        """
+        while True:
+            batch = [await self._transcript_queue.get()]
+            while len(batch) < ANALYSIS_BATCH_MAX:
+                try:
+                    batch.append(await asyncio.wait_for(
+                        self._transcript_queue.get(), timeout=0.05
+                    ))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                # The Guardian can only review the Worker's output, so a
+                # fully speculative review is not possible - instead a
+                # Guardian model prewarm runs in the same TaskGroup,
+                # overlapping its model load with the Worker's generation
+                # so a risk-positive review starts hot.
+                async with asyncio.TaskGroup() as tg:
+                    worker_task = tg.create_task(self.worker_agent.analyze_batch(
+                        [utterance for _, utterance, _ in batch],
+                        contexts=[context for _, _, context in batch]
+                    ))
+                    tg.create_task(self.guardian_agent.prewarm())
+                analyses = worker_task.result()
+
+                for (ts, utterance, _), analysis in zip(batch, analyses):
+                    # If risk detected, get guardian review
+                    if analysis['risk_detected']:
+                        analysis = await self.guardian_agent.review_alert(
+                            analysis,
+                            utterance
+                        )
+
+                        # Intern the text fields: cache hits and templated
+                        # verdicts repeat the same strings, so interning
+                        # stores one object instead of a copy per alert
+                        for key in ('explanation', 'suggestion'):
+                            value = analysis.get(key)
+                            if isinstance(value, str):
+                                analysis[key] = sys.intern(value)
+
+                        # Add alert
+                        with self._results_lock:
+                            self._alert_log.append({
+                                'ts': ts,
+                                'original': utterance,
+                                'analysis': analysis
+                            })
+                            self._total_alerts += 1
+
+            except Exception as e:
+                logger.error(f"Error analyzing transcripts: {e}")
+            finally:
+                for _ in batch:
+                    self._transcript_queue.task_done()
     
     def render_ui(self):
         """Render the Streamlit UI."""
@@ -124,11 +352,13 @@ class AegisApp:
         col1, col2, col3 = st.columns([2, 2, 6])
         
         with col1:
-            if st.button("🎤 Start Recording" if not st.session_state.is_recording else "⏹️ Stop Recording"):
-                if not st.session_state.is_recording:
-                    self.start_recording()
-                else:
-                    self.stop_recording()
+            # on_click runs before the click's rerun renders, so the
+            # label below already reflects the flipped state instead of
+            # lagging one rerun behind
+            st.button(
+                "⏹️ Stop Recording" if st.session_state.is_recording else "🎤 Start Recording",
+                on_click=self.toggle_recording
+            )
         
         with col2:
             if st.button("🗑️ Clear Session"):
@@ -145,43 +375,23 @@ class AegisApp:
         
         # Transcript column
         with col_transcript:
-            st.subheader("📝 Live Transcript")
-            transcript_container = st.container()
-            
-            with transcript_container:
-                if st.session_state.transcript:
-                    for entry in st.session_state.transcript[-10:]:  # Show last 10
-                        st.text(f"[{entry['time']}] {entry['text']}")
-                else:
-                    st.info("Transcript will appear here when recording starts...")
-        
+            self.render_transcript()
+
         # Alerts column
         with col_alerts:
-            st.subheader("⚠️ Compliance Alerts")
-            alerts_container = st.container()
-            
-            with alerts_container:
-                if st.session_state.alerts:
-                    for alert in st.session_state.alerts[-5:]:  # Show last 5
-                        with st.expander(f"🚨 Alert at {alert['time']}", expanded=True):
-                            st.error(f"**Original:** {alert['original']}")
-                            st.warning(f"**Risk:** {alert['analysis']['explanation']}")
-                            st.success(f"**Suggestion:** {alert['analysis']['suggestion']}")
-                            
-                            if alert['analysis'].get('guardian_reviewed'):
-                                quality = alert['analysis'].get('quality_score', 'N/A')
-                                st.caption(f"✓ Guardian reviewed (Quality: {quality}/10)")
-                else:
-                    st.info("Compliance alerts will appear here...")
+            self.render_alerts()
         
         # Statistics sidebar
         with st.sidebar:
             st.header("📊 Session Statistics")
-            st.metric("Total Utterances", len(st.session_state.transcript))
-            st.metric("Alerts Generated", len(st.session_state.alerts))
-            
-            if st.session_state.alerts and st.session_state.transcript:
-                compliance_rate = (1 - len(st.session_state.alerts) / len(st.session_state.transcript)) * 100
+            with self._results_lock:
+                total_transcripts = self._total_transcripts
+                total_alerts = self._total_alerts
+            st.metric("Total Utterances", total_transcripts)
+            st.metric("Alerts Generated", total_alerts)
+
+            if total_alerts and total_transcripts:
+                compliance_rate = (1 - total_alerts / total_transcripts) * 100
                 st.metric("Compliance Rate", f"{compliance_rate:.1f}%")
             
             st.divider()
@@ -191,50 +401,134 @@ class AegisApp:
             st.text(f"Analysis Model: {self.config.LOCAL_MODEL}")
             st.text(f"Guardian Model: {self.config.GUARDIAN_MODEL}")
     
+    # Fragments re-render just their own block every second, so live
+    # updates no longer re-execute the full script (header, sidebar,
+    # controls) once per second the way the old sleep+rerun loop did.
+
+    @st.fragment(run_every=1.0)
+    def render_transcript(self):
+        """Render the live transcript column."""
+        st.subheader("📝 Live Transcript")
+        transcript_container = st.container()
+
+        with transcript_container:
+            # Snapshot the visible tail under the lock; the pipeline
+            # appends from the I/O loop's thread
+            with self._results_lock:
+                entries = list(islice(
+                    self._transcript_log,
+                    max(0, len(self._transcript_log) - 10), None
+                ))
+            if entries:
+                # Show last 10
+                for entry in entries:
+                    shown = datetime.fromtimestamp(entry['ts']).strftime("%H:%M:%S")
+                    st.text(f"[{shown}] {entry['text']}")
+            else:
+                st.info("Transcript will appear here when recording starts...")
+
+    @st.fragment(run_every=1.0)
+    def render_alerts(self):
+        """Render the compliance alerts column."""
+        st.subheader("⚠️ Compliance Alerts")
+        alerts_container = st.container()
+
+        with alerts_container:
+            # Snapshot the visible tail under the lock; the analyzer
+            # appends from the I/O loop's thread
+            with self._results_lock:
+                alerts = list(islice(
+                    self._alert_log, max(0, len(self._alert_log) - 5), None
+                ))
+            if alerts:
+                # Show last 5
+                for alert in alerts:
+                    shown = datetime.fromtimestamp(alert['ts']).strftime("%H:%M:%S")
+                    with st.expander(f"🚨 Alert at {shown}", expanded=True):
+                        st.error(f"**Original:** {alert['original']}")
+                        st.warning(f"**Risk:** {alert['analysis']['explanation']}")
+                        st.success(f"**Suggestion:** {alert['analysis']['suggestion']}")
+
+                        if alert['analysis'].get('guardian_reviewed'):
+                            quality = alert['analysis'].get('quality_score', 'N/A')
+                            st.caption(f"✓ Guardian reviewed (Quality: {quality}/10)")
+            else:
+                st.info("Compliance alerts will appear here...")
+
+    def toggle_recording(self):
+        """Flip recording on or off from the record button's callback."""
+        if st.session_state.is_recording:
+            self.stop_recording()
+        else:
+            self.start_recording()
+
     def start_recording(self):
         """Start audio recording."""
+        # No st.rerun(): the button click that got us here already
+        # triggers a rerun, which sees the flipped state
         st.session_state.is_recording = True
         self.audio_handler.start_recording()
-        st.rerun()
     
     def stop_recording(self):
         """Stop audio recording."""
         st.session_state.is_recording = False
         self.audio_handler.stop_recording()
-        st.rerun()
+
+        # Flush any buffered fallback audio, then tear down the STT
+        # stream so the service finalizes in-flight audio
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            if self._audio_buffer:
+                asyncio.run_coroutine_threadsafe(
+                    self._flush_audio_buffer(), loop
+                )
+            if self._stt_connected:
+                asyncio.run_coroutine_threadsafe(
+                    self.watson_client.close_stt_stream(), loop
+                )
+        self._stt_connected = False
     
     def clear_session(self):
         """Clear session data."""
-        st.session_state.transcript = []
-        st.session_state.alerts = []
-        st.session_state.conversation_history = []
+        with self._results_lock:
+            self._transcript_log.clear()
+            self._alert_log.clear()
+            self._total_transcripts = 0
+            self._total_alerts = 0
+            self._history.clear()
+        # Stale verdicts must not leak into the next conversation. The
+        # cache is searched from the I/O loop's thread and FAISS reset()
+        # is not safe against a concurrent search(), so the clear runs
+        # on that loop rather than on this script thread
+        if self.worker_agent is not None:
+            loop = self._loop
+            if loop is not None and loop.is_running():
+                loop.call_soon_threadsafe(self.worker_agent.semantic_cache.clear)
+            else:
+                self.worker_agent.semantic_cache.clear()
         st.rerun()
 
 # Main application entry point
+@st.cache_resource
+def get_app() -> AegisApp:
+    """Return the initialized app, shared across reruns.
+
+    Constructing AegisApp per rerun re-ran initialize_components every
+    script execution (watson_client was None on each fresh instance),
+    reloading agents and handlers on every keystroke.
+    """
+    app = AegisApp()
+    if not app.initialize_components():
+        st.stop()
+    return app
+
 def main():
     """Main application entry point."""
-    app = AegisApp()
-    
-    # Initialize components on first run
-    if 'initialized' not in st.session_state:
-        if app.initialize_components():
-            st.session_state.initialized = True
-        else:
-            st.stop()
-    
-    # Set up the app components from session state if needed
-    if st.session_state.initialized and app.watson_client is None:
-        app.initialize_components()
-    
-    # Render UI
+    app = get_app()
+    app.init_session_state()
+
+    # Render UI; the transcript and alert fragments refresh themselves
     app.render_ui()
-    
-    # Auto-refresh for live updates
-    if st.session_state.is_recording:
-        st.empty()
-        import time
-        time.sleep(1)
-        st.rerun()
 
 if __name__ == "__main__":
     # Run with: streamlit run src/ui/streamlit_app.py